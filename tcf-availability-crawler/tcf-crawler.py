@@ -1,17 +1,19 @@
-import time
 import csv
+import mmap
+import os
 import signal
-from queue import Queue
-import requests
+import time
+import socket
+from queue import Empty, Full, Queue
 import concurrent.futures
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, WebDriverException
-from threading import Lock, BoundedSemaphore
-from tenacity import retry, stop_after_attempt, wait_exponential
+from threading import Event, Lock, Thread
 import logging
 
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.WARNING, handlers=[logging.StreamHandler()])
+logger = logging.getLogger(__name__)
 
 
 class Settings:
@@ -27,21 +29,25 @@ class Settings:
     chrome_prefs : dict
         The preferences to be set for the Chrome browser.
     page_load_timeout : int
-        The maximum time, in seconds, that the WebDriver will wait for a page to load.
+        The maximum time, in seconds, that the WebDriver will wait for a page to reach DOMContentLoaded.
     batch_size : int
         The number of rows to be kept in memory before they are written to the CSV file.
     tcf_wait_time : int
-        The time, in seconds, to wait before checking if the TCF API is available.
+        The maximum time, in seconds, to wait for the page to finish loading before checking if the TCF API is available.
     tcf_wait_interval : int
         The interval, in seconds, between consecutive checks for TCF API availability.
+    queue_chunk_size : int
+        The number of domains handed to a worker per queue operation.
+    blocked_urls : list
+        URL patterns that the browser refuses to download, e.g. images, fonts and stylesheets.
 
     Methods
     -------
-    __init__(self, driver_pool_size, chrome_args, chrome_prefs, page_load_timeout, batch_size, tcf_wait_time, tcf_wait_interval)
+    __init__(self, driver_pool_size, chrome_args, chrome_prefs, page_load_timeout, batch_size, tcf_wait_time, tcf_wait_interval, queue_chunk_size, blocked_urls)
         Initializes the Settings instance with the specified settings.
     """
 
-    def __init__(self, driver_pool_size, chrome_args, chrome_prefs, page_load_timeout, batch_size, tcf_wait_time, tcf_wait_interval):
+    def __init__(self, driver_pool_size, chrome_args, chrome_prefs, page_load_timeout, batch_size, tcf_wait_time, tcf_wait_interval, queue_chunk_size, blocked_urls):
         self.driver_pool_size = driver_pool_size
         self.chrome_args = chrome_args
         self.chrome_prefs = chrome_prefs
@@ -49,6 +55,8 @@ class Settings:
         self.batch_size = batch_size
         self.tcf_wait_time = tcf_wait_time
         self.tcf_wait_interval = tcf_wait_interval
+        self.queue_chunk_size = queue_chunk_size
+        self.blocked_urls = blocked_urls
 
 class WebDriverPool:
     """
@@ -58,10 +66,15 @@ class WebDriverPool:
     ----------
     size : int
         Number of WebDrivers in the pool.
-    semaphore : BoundedSemaphore
-        A semaphore to manage concurrent access to WebDriver instances.
     pool : Queue
-        The pool where WebDriver instances are stored.
+        The pool where idle WebDriver instances are stored. Each worker checks out one instance for its whole
+        lifetime, so the pool only hands out drivers at start-up and takes them back when workers stop.
+    drivers : set
+        Every live WebDriver instance created by the pool, including those currently checked out.
+    lock : Lock
+        A threading Lock guarding the drivers set, so each driver is quit exactly once.
+    shutting_down : Event
+        Set once quit_all_drivers has been called; broken drivers are no longer replaced after that.
     settings : Settings
         A Settings object containing various parameters.
 
@@ -69,20 +82,28 @@ class WebDriverPool:
     -------
     initialize_drivers():
         Populates the WebDriver pool with driver instances.
+    create_driver():
+        Creates a new WebDriver instance with the configured Chrome options.
     create_and_add_driver():
         Creates a new WebDriver instance and adds it to the pool.
     get_driver():
-        Retrieves a WebDriver instance from the pool, if available.
+        Retrieves a WebDriver instance from the pool, blocking until one is available.
+    reset_driver(driver: webdriver):
+        Resets a WebDriver instance between visits, replacing it if it's broken and the pool is not shutting down.
+    quit_driver(driver: webdriver):
+        Quits a WebDriver instance unless it has already been quit.
     return_driver(driver: webdriver):
-        Returns a WebDriver instance to the pool.
+        Returns a WebDriver instance, already reset by its worker, to the pool.
     quit_all_drivers():
-        Closes all WebDriver instances and empties the pool.
+        Closes all live WebDriver instances, checked out or not, and empties the pool.
     """
     def __init__(self, settings):
         """Initializes WebDriverPool with given settings."""
         self.size = settings.driver_pool_size
-        self.semaphore = BoundedSemaphore(self.size)
         self.pool = Queue(self.size)
+        self.drivers = set()
+        self.lock = Lock()
+        self.shutting_down = Event()
         self.settings = settings
         self.initialize_drivers()
 
@@ -99,170 +120,304 @@ class WebDriverPool:
         for _ in range(self.size):
             self.create_and_add_driver()
 
-    def create_and_add_driver(self):
-        """Creates a new WebDriver instance with the specified Chrome options and adds it to the pool."""
+    def create_driver(self):
+        """Creates a new WebDriver instance with the specified Chrome options."""
         chrome_options = Options()
         for arg in self.settings.chrome_args:
             chrome_options.add_argument(arg)
         chrome_options.add_experimental_option("prefs", self.settings.chrome_prefs)
+        # Return from driver.get at DOMContentLoaded; scan_domain waits for the rest of the load itself, bounded by tcf_wait_time.
+        chrome_options.page_load_strategy = 'eager'
         driver = webdriver.Chrome(options=chrome_options)
-        driver.set_page_load_timeout(self.settings.page_load_timeout)
-        self.pool.put(driver)
+        with self.lock:
+            self.drivers.add(driver)
+        try:
+            # Headless Chrome largely ignores the content-setting prefs, so block non-essential assets at the network level.
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.settings.blocked_urls})
+            driver.set_page_load_timeout(self.settings.page_load_timeout)
+            driver.set_script_timeout(self.settings.tcf_wait_time + 1)
+        except Exception:
+            self.quit_driver(driver)
+            raise
+        return driver
+
+    def create_and_add_driver(self):
+        """Creates a new WebDriver instance and adds it to the pool."""
+        self.pool.put(self.create_driver())
 
     def get_driver(self):
         """
         Retrieves a WebDriver instance from the pool. If no instance is available, 
         this method will block until one becomes available.
         """
-        self.semaphore.acquire()
         return self.pool.get()
 
-    def return_driver(self, driver: webdriver):
+    def reset_driver(self, driver: webdriver):
         """
-        Returns a WebDriver instance to the pool, replacing it if it's broken.
-        
+        Resets a WebDriver instance between visits and returns the instance that should be used next.
+        Pending page loads are aborted and cookies are cleared, without navigating away from the page.
+
         If a WebDriverException is raised when accessing the instance, it is quit and replaced by a new one.
+        Once the pool is shutting down, None is returned instead and no new driver is started.
         """
+        if self.shutting_down.is_set():
+            return None
         try:
-            driver.get("about:blank")
-            self.pool.put(driver)
+            driver.execute_cdp_cmd('Page.stopLoading', {})
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            return driver
         except WebDriverException:
-            logging.error("Error in WebDriver, restarting it.")
-            driver.quit()
-            self.create_and_add_driver()
-        finally:
-            self.semaphore.release()
+            self.quit_driver(driver)
+            if self.shutting_down.is_set():
+                return None
+            logger.error("Error in WebDriver, restarting it.")
+            driver = self.create_driver()
+            if self.shutting_down.is_set():
+                self.quit_driver(driver)
+                return None
+            return driver
+
+    def return_driver(self, driver: webdriver):
+        """
+        Returns a WebDriver instance to the pool. Workers reset their driver after every domain, so it is put
+        back as is. Nothing is returned once the pool is shutting down, since its drivers have been quit.
+        """
+        if driver is not None and not self.shutting_down.is_set():
+            self.pool.put(driver)
+
+    def quit_driver(self, driver: webdriver):
+        """Quits a WebDriver instance and forgets it, unless another thread has already done so."""
+        with self.lock:
+            if driver not in self.drivers:
+                return
+            self.drivers.discard(driver)
+        driver.quit()
 
     def quit_all_drivers(self):
-        """Quits all WebDriver instances in the pool and removes them from the pool."""
+        """
+        Quits all live WebDriver instances and removes them from the pool.
+
+        Drivers held by workers are quit as well, and the pool is marked as shutting down so that workers
+        stop instead of starting replacement drivers.
+        """
+        self.shutting_down.set()
         while not self.pool.empty():
-            driver = self.pool.get()
-            driver.quit()
+            self.pool.get()
+        with self.lock:
+            drivers = list(self.drivers)
+        for driver in drivers:
+            self.quit_driver(driver)
 
 
 class Scraper:
     """
-    A class used to scrape a given domain and store the results.
+    A class used to scrape domains with a single long-lived WebDriver and queue the results for writing.
 
     Attributes
     ----------
-    session : Session
-        A requests Session object for making HTTP requests.
     driver_pool : WebDriverPool
         A pool of WebDriver instances for accessing websites.
     driver : WebDriver
-        A WebDriver instance for this scraper.
-    domain : str
-        The domain that this scraper is tasked with scraping.
-    writer : _csv.writer
-        A CSV writer for outputting the scrape results.
-    lock : Lock
-        A threading Lock for controlling access to shared resources.
-    data_buffer : list
-        A buffer for storing data before it is written to the CSV file.
+        A WebDriver instance for this scraper, checked out once for its whole lifetime.
+    result_queue : Queue
+        The queue consumed by the writer thread, receiving one CSV row per scanned domain.
     settings : Settings
         A Settings object containing various parameters.
 
     Methods
     -------
-    flush_data_buffer():
-        Writes the contents of the data buffer to the CSV file and clears the buffer.
-    add_to_data_buffer(data):
-        Adds a piece of data to the data buffer and flushes the buffer if it is full.
-    load_url(url):
-        Loads a URL using the WebDriver. If loading fails, retries up to 3 times.
-    scan_domain():
-        Scans the domain, records whether the TCF API is available, and writes the results to the CSV file.
-    flush_data_buffer_if_needed():
-        Flushes the data buffer if it is full.
+    load_url(url, attempts=3):
+        Loads a URL using the WebDriver, making up to `attempts` attempts if loading fails.
+    run(domain_queue):
+        Scans chunks of domains taken from the queue until a None sentinel is received.
+    requeue(domain_queue, domains):
+        Puts unscanned domains back on the queue for the remaining workers.
+    detect_tcf_api(attempts=2):
+        Returns whether the current page exposes the TCF API, re-running the probe if the page navigates away.
+    scan_domain(domain):
+        Scans the domain, records whether the TCF API is available, and queues the result for writing.
     """
-    def __init__(self, domain, writer, lock, web_driver_pool, settings):
-        """Initializes Scraper with given domain, writer, lock, WebDriverPool, and settings."""
-        self.session = requests.Session()
+    def __init__(self, result_queue, web_driver_pool, settings):
+        """Initializes Scraper with given result queue, WebDriverPool, and settings."""
         self.driver_pool = web_driver_pool
         self.driver = None
-        self.domain = domain
-        self.writer = writer
-        self.lock = lock
-        self.data_buffer = []
+        self.result_queue = result_queue
         self.settings = settings
 
-    def flush_data_buffer(self):
+    def load_url(self, url, attempts=3):
         """
-        Writes the contents of the data buffer to the CSV file and clears the buffer.
-        This operation is thread-safe due to the usage of a lock.
+        Loads a URL using the WebDriver. If loading fails due to a timeout or WebDriver exception,
+        makes up to `attempts` attempts with exponentially increasing wait times (2 to 10 seconds),
+        re-raising the last error.
         """
-        with self.lock:
-            self.writer.writerows(self.data_buffer)
-            self.data_buffer = []
-        logging.info('Data buffer flushed.')
+        for attempt in range(attempts):
+            try:
+                self.driver.get(url)
+                return
+            except (TimeoutException, WebDriverException):
+                if attempt == attempts - 1 or self.driver_pool.shutting_down.is_set():
+                    raise
+                logger.error("Failed to load %s, retrying...", url)
+                time.sleep(max(2, min(10, 2 ** attempt)))
 
-    def add_to_data_buffer(self, data):
+    def run(self, domain_queue):
         """
-        Adds a piece of data to the data buffer and flushes the buffer if it is full.
+        Checks out one WebDriver and scans chunks of domains taken from the queue until a None sentinel is received
+        or the pool starts shutting down. The driver is reset between domains and returned to the pool on exit.
+        If a broken driver cannot be replaced, the rest of the chunk is put back on the queue for the other
+        workers and this worker stops.
         """
-        self.data_buffer.append(data)
-        if len(self.data_buffer) >= self.settings.batch_size:
-            self.flush_data_buffer()
+        self.driver = self.driver_pool.get_driver()
+        try:
+            while (chunk := domain_queue.get()) is not None:
+                for i, domain in enumerate(chunk):
+                    if self.driver_pool.shutting_down.is_set():
+                        return
+                    self.scan_domain(domain)
+                    try:
+                        self.driver = self.driver_pool.reset_driver(self.driver)
+                    except Exception as e:
+                        logger.error("Failed to restart WebDriver, stopping worker: %s", e)
+                        self.driver = None
+                        self.requeue(domain_queue, chunk[i + 1:])
+                        return
+        finally:
+            self.driver_pool.return_driver(self.driver)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max= 10))
-    def load_url(self, url):
+    def requeue(self, domain_queue, domains):
         """
-        Loads a URL using the WebDriver. If loading fails due to a timeout or WebDriver exception,
-        retries up to 3 times with exponentially increasing wait times.
+        Puts unscanned domains back on the queue for the remaining workers. The domains are dropped, with an error
+        logged, if no live WebDriver is left to scan them.
         """
-        try:
-            self.driver.get(url)
-        except (TimeoutException, WebDriverException) as e:
-            logging.error(f"Failed to load {url}, retrying...")
-            raise
+        while domains:
+            try:
+                domain_queue.put(domains, timeout=1)
+                return
+            except Full:
+                if not self.driver_pool.drivers:
+                    logger.error("No WebDriver left, dropping %d domains.", len(domains))
+                    return
 
-    def scan_domain(self):
+    def detect_tcf_api(self, attempts=2):
         """
-        Scans the domain, records whether the TCF API is available, and writes the results to the CSV file.
+        Returns whether the current page exposes the TCF API. If the document is replaced while the probe is
+        waiting, e.g. by a JavaScript or meta-refresh redirect, the probe is run again in the new document,
+        making up to `attempts` attempts.
+        """
+        for attempt in range(attempts):
+            try:
+                # CMPs loaded by async scripts may only define __tcfapi after DOMContentLoaded, so poll inside the page
+                # until the API appears or the document is complete. The whole wait costs a single WebDriver command.
+                return self.driver.execute_async_script("""
+                    var timeout = arguments[0], interval = arguments[1];
+                    var callback = arguments[arguments.length - 1];
+                    var start = Date.now();
+                    (function poll() {
+                        if (typeof window.__tcfapi === 'function') return callback(true);
+                        if (document.readyState === 'complete' || Date.now() - start > timeout) return callback(false);
+                        setTimeout(poll, interval);
+                    })();
+                """, self.settings.tcf_wait_time * 1000, self.settings.tcf_wait_interval * 1000)
+            except WebDriverException: # includes JavascriptException for "document unloaded while waiting for result"
+                if attempt == attempts - 1 or self.driver_pool.shutting_down.is_set():
+                    raise
+                logger.info("TCF probe interrupted by a navigation, retrying in the new document.")
+
+    def scan_domain(self, domain):
+        """
+        Scans the domain, records whether the TCF API is available, and queues the result for writing.
+        Nothing is recorded for a scan cut short by the pool shutting down, since its driver was quit mid-page.
         """
         try:
-            self.driver = self.driver_pool.get_driver()
-            url = 'https://www.' + self.domain
+            host = 'www.' + domain
+            url = 'https://' + host
+            try:
+                # A DNS lookup is far cheaper than a page load, so unresolvable hosts never reach Chrome.
+                socket.getaddrinfo(host, 443, proto=socket.IPPROTO_TCP)
+            except socket.gaierror as e:
+                self.result_queue.put([domain, f'Error: {e}'])
+                logger.error("%s: DNS lookup failed: %s", url, e)
+                return
+
             try:
                 self.load_url(url)
             except (TimeoutException, WebDriverException) as e:
-                self.add_to_data_buffer([self.domain, f'Error: {e}'])
-                logging.error(f"{url}: Error: {e}")
+                if self.driver_pool.shutting_down.is_set():
+                    return
+                self.result_queue.put([domain, f'Error: {e}'])
+                logger.error("%s: Error: %s", url, e)
                 return
 
-            start_time = time.time()
-            tcf_available = False
-            while time.time() - start_time < self.settings.tcf_wait_time:
-                result = self.driver.execute_script('return typeof window.__tcfapi;')
-                if result and 'function' in result:
-                    tcf_available = True
-                    break
-                time.sleep(self.settings.tcf_wait_interval)
+            tcf_available = self.detect_tcf_api()
 
             if not tcf_available:
-                self.add_to_data_buffer([self.domain, 'No'])
-                print(f"{url}: TCF API is not available")
+                self.result_queue.put([domain, 'No'])
+                logger.info("%s: TCF API is not available", domain)
             else:
-                self.add_to_data_buffer([self.domain, 'Yes'])
-                print(f"{self.domain}: TCF API is available")
-
-            self.flush_data_buffer_if_needed()
+                self.result_queue.put([domain, 'Yes'])
+                logger.info("%s: TCF API is available", domain)
         except Exception as e:
-            logging.error(f"Error while scanning domain {self.domain}: {e}")
-            self.add_to_data_buffer([self.domain, f'Error: {e}'])
-        finally:
-            self.driver_pool.return_driver(self.driver)
-            self.flush_data_buffer()
+            if self.driver_pool.shutting_down.is_set():
+                return
+            logger.error("Error while scanning domain %s: %s", domain, e)
+            self.result_queue.put([domain, f'Error: {e}'])
 
-    def flush_data_buffer_if_needed(self):
-        """
-        Checks if the data buffer is full. If so, it calls the flush_data_buffer method to write the
-        contents of the buffer to the CSV file and then clears the buffer.
-        """
-        with self.lock:
-            if len(self.data_buffer) >= self.settings.batch_size:
-                self.flush_data_buffer()
+
+def read_domains(path):
+    """
+    Yields the domain from the first column of each line in the input CSV file.
+    The file is memory-mapped and split by hand, skipping the csv module's per-row parsing; blank lines are ignored.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b''):
+                domain = line.split(b',', 1)[0].strip()
+                if domain:
+                    yield domain.decode()
+
+
+def put_while_workers_alive(domain_queue, item, futures):
+    """
+    Puts an item on the domain queue, waiting for free space only while at least one worker is still running.
+    Returns False, dropping the item, once every worker has stopped.
+    """
+    while True:
+        try:
+            domain_queue.put(item, timeout=1)
+            return True
+        except Full:
+            if all(future.done() for future in futures):
+                return False
+
+
+def write_results(result_queue, writer, batch_size):
+    """
+    Consumes rows from the result queue and writes them to the CSV file in batches of batch_size.
+    Runs in a single dedicated thread, so scraping threads never block on file I/O. Stops, after writing
+    any remaining rows, when a None sentinel is received.
+    """
+    batch = []
+    while (row := result_queue.get()) is not None:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            write_batch(writer, batch)
+    write_batch(writer, batch)
+
+
+def write_batch(writer, batch):
+    """
+    Writes a batch of rows to the CSV file and clears it. A failed write is logged and the batch dropped,
+    so the writer thread keeps draining the result queue and scrapers never block on it.
+    """
+    try:
+        writer.writerows(batch)
+        logger.info('Data buffer flushed.')
+    except Exception as e:
+        logger.error("Failed to write %d results: %s", len(batch), e)
+    batch.clear()
 
 
 if __name__ == '__main__':
@@ -274,10 +429,18 @@ if __name__ == '__main__':
         "permissions.default.stylesheet": 2, 
         "javascript.enabled": True
     }
-    PAGE_LOAD_TIMEOUT = 60
-    BATCH_SIZE = 100
+    PAGE_LOAD_TIMEOUT = 15
+    BATCH_SIZE = 1000
+    RESULT_QUEUE_SIZE = 10000
     TCF_WAIT_TIME = 6
     TCF_WAIT_INTERVAL = 0.25
+    QUEUE_CHUNK_SIZE = 16
+    BLOCKED_URLS = [
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg",
+        "*.woff", "*.woff2", "*.ttf",
+        "*.mp4", "*.webm",
+        "*.css"
+    ]
     INPUT_FILE = 'domains.csv'
     OUTPUT_FILE = 'results.csv'
 
@@ -288,36 +451,71 @@ if __name__ == '__main__':
         page_load_timeout=PAGE_LOAD_TIMEOUT,
         batch_size=BATCH_SIZE,
         tcf_wait_time=TCF_WAIT_TIME,
-        tcf_wait_interval=TCF_WAIT_INTERVAL
+        tcf_wait_interval=TCF_WAIT_INTERVAL,
+        queue_chunk_size=QUEUE_CHUNK_SIZE,
+        blocked_urls=BLOCKED_URLS
     )
 
-    with open(INPUT_FILE) as f, open(OUTPUT_FILE, 'w') as csvfile:
-        reader = csv.reader(f)
+    with open(OUTPUT_FILE, 'w', buffering=1 << 20, newline='') as csvfile:
         writer = csv.writer(csvfile, lineterminator='\n')
         writer.writerow(['Domain', 'TCF API Available'])
-        csvfile.flush()
-
-        lock = Lock()
-
-        with WebDriverPool(settings) as web_driver_pool:
-            def cleanup(signum, frame):
-                logging.info('Caught signal, quitting all drivers...')
-                web_driver_pool.quit_all_drivers()
-                exit(0)
-
-            signal.signal(signal.SIGINT, cleanup)
-            signal.signal(signal.SIGTERM, cleanup)
-
-            futures = {}
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                for row in reader:
-                    domain = row[0]
-                    scraper = Scraper(domain, writer, lock, web_driver_pool, settings)
-                    futures[executor.submit(scraper.scan_domain)] = domain # store each Future object in a dictionary along with its corresponding domain.
-
-            for future in concurrent.futures.as_completed(futures):
-                domain = futures[future]
-                try:
-                    future.result() # Return the result of the future as soon as it is available
-                except Exception as e:
-                    logging.error(f"Error in worker thread for domain {domain}: {e}")
+
+        result_queue = Queue(RESULT_QUEUE_SIZE)
+        writer_thread = Thread(target=write_results, args=(result_queue, writer, settings.batch_size))
+        writer_thread.start()
+
+        futures = []
+        try:
+            with WebDriverPool(settings) as web_driver_pool:
+                def cleanup(signum, frame):
+                    if web_driver_pool.shutting_down.is_set():
+                        return
+                    logger.info('Caught signal, quitting all drivers...')
+                    web_driver_pool.quit_all_drivers()
+                    exit(0)
+
+                signal.signal(signal.SIGINT, cleanup)
+                signal.signal(signal.SIGTERM, cleanup)
+
+                # Bounded, so the reader blocks instead of loading the whole input into memory ahead of the workers.
+                domain_queue = Queue(settings.driver_pool_size * 4)
+                with concurrent.futures.ThreadPoolExecutor(max_workers=settings.driver_pool_size) as executor:
+                    # One long-lived worker per driver, each pulling domains from the shared queue.
+                    futures = [
+                        executor.submit(Scraper(result_queue, web_driver_pool, settings).run, domain_queue)
+                        for _ in range(settings.driver_pool_size)
+                    ]
+                    try:
+                        chunk = []
+                        for domain in read_domains(INPUT_FILE):
+                            chunk.append(domain)
+                            if len(chunk) >= settings.queue_chunk_size:
+                                if not put_while_workers_alive(domain_queue, chunk, futures):
+                                    logger.error("All worker threads have stopped, abandoning the remaining domains.")
+                                    chunk = []
+                                    break
+                                chunk = []
+                        if chunk:
+                            put_while_workers_alive(domain_queue, chunk, futures)
+                    finally:
+                        if web_driver_pool.shutting_down.is_set():
+                            # Interrupted by a signal: discard pending domains so the sentinels fit in the queue.
+                            try:
+                                while True:
+                                    domain_queue.get_nowait()
+                            except Empty:
+                                pass
+                        for _ in futures:
+                            put_while_workers_alive(domain_queue, None, futures) # one sentinel per worker to signal the end of the input
+
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error("Error in worker thread: %s", e)
+        finally:
+            # Also reached on SIGINT/SIGTERM, so queued results are written before the file is closed. A signal can
+            # interrupt the executor shutdown, so wait for the workers here before stopping the writer.
+            concurrent.futures.wait(futures)
+            result_queue.put(None) # all workers are done, let the writer drain the queue and stop
+            writer_thread.join()